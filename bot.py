@@ -1,20 +1,48 @@
 import os
+import io
+import csv
 import json
+import hmac
+import atexit
 import logging
-import requests
 import time
+import threading
 import uuid
+from collections import deque
+from functools import lru_cache
 from datetime import datetime
-from flask import Flask, request, jsonify
+from quart import Quart, Response, request, jsonify
 from telegram import Update, Bot
 from telegram.ext import Application, CommandHandler, MessageHandler, filters, CallbackContext, ConversationHandler
 import asyncio
-import aiohttp
-from typing import Dict, Optional
+import concurrent.futures
+from typing import TYPE_CHECKING, Dict, Optional, Tuple
 import re
+from cachetools import TTLCache
+from pycooldown import FixedCooldown
 
-# Initialize Flask app (for Vercel serverless)
-app = Flask(__name__)
+if TYPE_CHECKING:
+    import aiohttp
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Initialize Quart app (ASGI, for Vercel serverless)
+app = Quart(__name__)
+
+# JSON encode/decode helpers (orjson when available, stdlib json otherwise)
+if orjson is not None:
+    json_loads = orjson.loads
+    
+    def json_dumps(obj) -> str:
+        return orjson.dumps(obj).decode('utf-8')
+else:
+    json_loads = json.loads
+    
+    def json_dumps(obj) -> str:
+        return json.dumps(obj, ensure_ascii=False)
 
 # Configure logging
 logging.basicConfig(
@@ -28,32 +56,178 @@ TELEGRAM_BOT_TOKEN = os.environ.get('TELEGRAM_BOT_TOKEN')
 FAUCETPAY_API_KEY = os.environ.get('FAUCETPAY_API_KEY')
 VERCEL_URL = os.environ.get('VERCEL_URL', '')  # Get Vercel URL
 
+def parse_admin_ids(value: str) -> frozenset:
+    """Parse comma-separated Telegram user IDs, skipping malformed entries"""
+    admin_ids = set()
+    for admin_id in value.split(','):
+        admin_id = admin_id.strip()
+        if not admin_id:
+            continue
+        try:
+            admin_ids.add(int(admin_id))
+        except ValueError:
+            logger.warning(f"Ignoring invalid admin ID in ADMIN_IDS: {admin_id!r}")
+    return frozenset(admin_ids)
+
+# Telegram user IDs with admin access (comma-separated, e.g. "123456789,987654321")
+ADMIN_IDS = parse_admin_ids(os.environ.get('ADMIN_IDS', ''))
+
 # FaucetPay API settings
 FAUCETPAY_API_URL = "https://faucetpay.io/api/v1/send"
 CURRENCY = "DGB"
 AMOUNT = "0.00000001"  # 1 satoshi
 DENGO = "1"
 
+# Time budget for handling one webhook update (Vercel maxDuration is 30s)
+WEBHOOK_TIMEOUT = 8
+# Share of that budget for the FaucetPay call; the rest covers the Telegram replies around it
+FAUCETPAY_TIMEOUT = WEBHOOK_TIMEOUT - 3
+
 # Conversation states
 WAITING_FOR_EMAIL = 1
 
+# Cooldown between claims
+CLAIM_COOLDOWN = 86400  # 24 hours in seconds
+
 # Email storage - using Vercel's /tmp directory for file storage
 EMAIL_FILE = "/tmp/user_emails.txt"
 
+# Display format for claim timestamps (entries store time.time() floats)
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# Email format check (\Z so a trailing newline is not accepted)
+_EMAIL_RE = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}\Z')
+
+# Append handle to EMAIL_FILE and in-memory mirror of its entries (set up in init_bot)
+_EMAIL_FH = None
+_EMAIL_CACHE = []
+
+# Lines waiting to be written; flushed in batches to avoid a sync per claim
+EMAIL_FLUSH_BATCH = 32
+EMAIL_FLUSH_INTERVAL = 5  # seconds
+_PENDING = deque()
+_LAST_FLUSH = time.time()
+
+# Running claim statistics, kept in step with _EMAIL_CACHE
+_TOTAL_CLAIMS = 0
+_UNIQUE_USERS = set()
+
 class EmailStorage:
     """Class to handle email storage"""
     
     @staticmethod
-    def save_email(email: str, user_data: Dict):
-        """Save email and user data to file"""
+    def open():
+        """Open the email file for appending and load existing entries into memory"""
+        global _EMAIL_FH, _TOTAL_CLAIMS
+        # A failed load must not stop new claims from being saved
+        try:
+            _EMAIL_CACHE[:] = EmailStorage._load_existing()
+        except Exception as e:
+            logger.error(f"Error reading emails: {e}")
+            _EMAIL_CACHE.clear()
+        _TOTAL_CLAIMS = len(_EMAIL_CACHE)
+        _UNIQUE_USERS.clear()
+        _UNIQUE_USERS.update(e.get('user_id') for e in _EMAIL_CACHE)
+        
         try:
             # Create directory if it doesn't exist
             os.makedirs(os.path.dirname(EMAIL_FILE), exist_ok=True)
             
+            if _EMAIL_FH is None:
+                _EMAIL_FH = open(EMAIL_FILE, 'a', buffering=8192, encoding='utf-8')
+                # A killed write can leave a partial last line; start new entries on a fresh one
+                if not EmailStorage._ends_with_newline():
+                    _EMAIL_FH.write('\n')
+        except Exception as e:
+            logger.error(f"Error opening email storage: {e}")
+    
+    @staticmethod
+    def close():
+        """Flush and close the email file"""
+        global _EMAIL_FH
+        EmailStorage.flush()
+        if _EMAIL_FH is not None:
+            try:
+                _EMAIL_FH.close()
+            except Exception as e:
+                logger.error(f"Error closing email storage: {e}")
+            _EMAIL_FH = None
+    
+    @staticmethod
+    def flush():
+        """Write pending entries to the email file and sync them to disk"""
+        global _LAST_FLUSH
+        _LAST_FLUSH = time.time()
+        if not _PENDING:
+            return
+        try:
+            _EMAIL_FH.writelines(_PENDING)
+            _EMAIL_FH.flush()
+            os.fsync(_EMAIL_FH.fileno())
+        except Exception as e:
+            logger.error(f"Error writing emails: {e}")
+            # Log to Vercel logs as backup
+            for line in _PENDING:
+                logger.info(f"BACKUP_EMAIL_LOG: {line.rstrip()}")
+        _PENDING.clear()
+    
+    @staticmethod
+    def _schedule_flush():
+        """Flush the queue after EMAIL_FLUSH_INTERVAL even if no other claim arrives"""
+        try:
+            asyncio.get_running_loop().call_later(EMAIL_FLUSH_INTERVAL, EmailStorage.flush)
+        except RuntimeError:
+            # No event loop to run the timer on, so write immediately
+            EmailStorage.flush()
+    
+    @staticmethod
+    def _load_existing():
+        """Read saved entries from the email file"""
+        if not os.path.exists(EMAIL_FILE):
+            return []
+        
+        emails = []
+        with open(EMAIL_FILE, 'r', encoding='utf-8', errors='replace') as f:
+            for line_number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                # Skip corrupt or truncated lines instead of dropping the whole log
+                try:
+                    entry = json_loads(line.strip())
+                except ValueError as e:
+                    logger.warning(f"Skipping unreadable email entry on line {line_number}: {e}")
+                    continue
+                if not isinstance(entry, dict):
+                    logger.warning(f"Skipping unreadable email entry on line {line_number}")
+                    continue
+                # Older entries stored a formatted local-time string
+                if isinstance(entry.get('timestamp'), str):
+                    try:
+                        entry['timestamp'] = datetime.strptime(entry['timestamp'], TIMESTAMP_FORMAT).timestamp()
+                    except ValueError:
+                        logger.warning(f"Unrecognized timestamp on line {line_number}: {entry['timestamp']}")
+                        entry['timestamp'] = None
+                emails.append(entry)
+        
+        return emails
+    
+    @staticmethod
+    def _ends_with_newline():
+        """Check whether the email file is empty or ends with a complete line"""
+        with open(EMAIL_FILE, 'rb') as f:
+            if f.seek(0, os.SEEK_END) == 0:
+                return True
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b'\n'
+    
+    @staticmethod
+    def save_email(email: str, user_data: Dict):
+        """Save email and user data to file"""
+        global _TOTAL_CLAIMS
+        try:
             # Prepare data to save
-            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
             entry = {
-                'timestamp': timestamp,
+                'timestamp': time.time(),
                 'email': email,
                 'user_id': user_data.get('id'),
                 'username': user_data.get('username'),
@@ -61,9 +235,18 @@ class EmailStorage:
                 'last_name': user_data.get('last_name')
             }
             
-            # Append to file
-            with open(EMAIL_FILE, 'a', encoding='utf-8') as f:
-                f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+            # Queue for the file; written once the batch fills or the interval passes
+            if _EMAIL_FH is None:
+                raise RuntimeError("email storage is not open")
+            _PENDING.append(json_dumps(entry) + '\n')
+            _EMAIL_CACHE.append(entry)
+            _TOTAL_CLAIMS += 1
+            _UNIQUE_USERS.add(entry['user_id'])
+            
+            if len(_PENDING) >= EMAIL_FLUSH_BATCH or time.time() - _LAST_FLUSH > EMAIL_FLUSH_INTERVAL:
+                EmailStorage.flush()
+            elif len(_PENDING) == 1:
+                EmailStorage._schedule_flush()
             
             logger.info(f"Email saved: {email} for user {user_data.get('id')}")
             return True
@@ -85,73 +268,231 @@ class EmailStorage:
     
     @staticmethod
     def get_all_emails():
-        """Get all saved emails (for admin use)"""
-        try:
-            if not os.path.exists(EMAIL_FILE):
-                return []
-            
-            emails = []
-            with open(EMAIL_FILE, 'r', encoding='utf-8') as f:
-                for line in f:
-                    if line.strip():
-                        emails.append(json.loads(line.strip()))
-            
-            return emails
-        except Exception as e:
-            logger.error(f"Error reading emails: {e}")
-            return []
+        """Get all saved emails (for admin use, served from memory)"""
+        return _EMAIL_CACHE
     
     @staticmethod
     def clear_emails():
         """Clear all saved emails (admin function)"""
         try:
+            EmailStorage.close()
             if os.path.exists(EMAIL_FILE):
                 os.remove(EMAIL_FILE)
+            EmailStorage.open()
             return True
         except:
             return False
 
 # Rate limiting storage (using in-memory for serverless)
-user_claims = {}
+# Entries expire with the claim cooldown, so presence means "still cooling down"
+# Only the bot handlers (all on BOT_LOOP) write to it, so it needs no lock
+user_claims = TTLCache(maxsize=100_000, ttl=CLAIM_COOLDOWN)
+
+# Claim limits: one payout per cooldown window, one email attempt per minute
+DAILY = FixedCooldown(capacity=1, period=CLAIM_COOLDOWN)
+ANTI_SPAM = FixedCooldown(capacity=1, period=60)
+
+# Shared HTTP session for FaucetPay calls (keeps connections alive between claims)
+# (created on BOT_LOOP, the only loop it is ever used from)
+HTTP_SESSION: Optional['aiohttp.ClientSession'] = None
+
+def get_http_session() -> 'aiohttp.ClientSession':
+    """Get the shared HTTP session, creating it on first use"""
+    global HTTP_SESSION
+    if HTTP_SESSION is None or HTTP_SESSION.closed:
+        # Imported here so cold starts serving only GET routes skip loading aiohttp
+        import aiohttp
+        
+        connector = aiohttp.TCPConnector(limit=100, keepalive_timeout=60)
+        HTTP_SESSION = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=FAUCETPAY_TIMEOUT)
+        )
+    return HTTP_SESSION
+
+def format_timestamp(timestamp: Optional[float]) -> str:
+    """Format a stored claim timestamp for display"""
+    if timestamp is None:
+        return ''
+    return datetime.fromtimestamp(timestamp).strftime(TIMESTAMP_FORMAT)
+
+def format_cooldown(seconds: float) -> Tuple[int, int]:
+    """Split a remaining cooldown into whole hours and minutes"""
+    hours, rem = divmod(int(seconds), 3600)
+    return hours, rem // 60
+
+# Last ISO timestamp handed out, as (text, whole second it was made for)
+_LAST_ISO = ('', 0)
+
+def now_iso_cached() -> str:
+    """Current time in ISO format, formatted at most once per second"""
+    global _LAST_ISO
+    now = int(time.time())
+    if now != _LAST_ISO[1]:
+        _LAST_ISO = (datetime.fromtimestamp(now).isoformat(), now)
+    return _LAST_ISO[0]
 
 def is_valid_email(email: str) -> bool:
     """Validate email format"""
-    pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-    return bool(re.match(pattern, email))
+    return _EMAIL_RE.match(email) is not None
+
+# Bot messages (static texts, and bound .format templates for the rest)
+WELCOME_TEMPLATE = (
+    "?? **Congratulations, {first_name}!**\n\n"
+    "?? **You've won {dengo} USDT!**\n\n"
+    "To claim your reward:\n"
+    "1?? Enter your **FaucetPay registered email**\n"
+    "2?? We'll send {dengo} USDT instantly\n"
+    "3?? Check your FaucetPay balance\n\n"
+    "?? **Please enter your FaucetPay email now:**\n"
+    "(Example: yourname@example.com)"
+).format
+
+COOLDOWN_TEMPLATE = (
+    "? **Cooldown Active**\n\n"
+    "You have already claimed your reward.\n"
+    "Next claim available in: **{hours}h {minutes}m**\n\n"
+    "Please wait and try again later!"
+).format
+
+INVALID_EMAIL_TEXT = (
+    "? **Invalid Email Format**\n\n"
+    "Please enter a valid email address.\n"
+    "Format: name@domain.com\n\n"
+    "Try again:"
+)
+
+WAIT_TEXT = "? Please wait a moment before trying again."
+
+ALREADY_CLAIMED_TEXT = (
+    "? You have already claimed your reward.\n"
+    "Use /status to see when you can claim again."
+)
+
+PROCESSING_TEXT = (
+    "? **Processing your request...**\n"
+    "Please wait while we send your USDT reward."
+)
+
+SUCCESS_TEMPLATE = (
+    "? **Success! Reward Sent!**\n\n"
+    "**Amount:** {amount} USDT\n"
+    "**Sent to:** {email}\n"
+    "**Transaction ID:** `{tx}`\n\n"
+    "?? **Next Steps:**\n"
+    "1. Check your FaucetPay account\n"
+    "2. Verify the transaction\n"
+    "3. Come back in 24 hours for more!\n\n"
+    "? **Next claim:** 24 hours from now\n\n"
+    "Thank you for using our bot! ??"
+).format
+
+FAILURE_TEMPLATE = (
+    "? **Transaction Failed**\n\n"
+    "**Error:** {error}\n\n"
+    "**Possible reasons:**\n"
+    " Email not registered with FaucetPay\n"
+    " FaucetPay API limit reached\n"
+    " Temporary service issue\n\n"
+    "**Please try again with a valid FaucetPay email.**\n"
+    "Use /start to retry."
+).format
+
+TIMEOUT_TEXT = (
+    "? **Request Timeout**\n\n"
+    "The service is taking too long to respond.\n"
+    "Please try again in a few minutes.\n\n"
+    "Use /start to retry."
+)
+
+SERVICE_UNAVAILABLE_TEXT = (
+    "?? **Service Temporarily Unavailable**\n\n"
+    "We're experiencing technical difficulties.\n"
+    "Please try again later.\n\n"
+    "Use /start to retry."
+)
+
+HELP_TEXT = (
+    "?? **Faucet Bot Help**\n\n"
+    "**?? What is this?**\n"
+    "Free USDT faucet bot! Get small amounts of USDT for free.\n\n"
+    "**?? Commands:**\n"
+    "/start - Claim your free USDT\n"
+    "/help - Show this help message\n"
+    "/status - Check your claim status\n"
+    "/stats - View bot statistics (admin)\n\n"
+    "**? How to claim:**\n"
+    "1. Use /start command\n"
+    "2. Enter your FaucetPay email\n"
+    "3. Receive 0.00000001 USDT instantly\n"
+    "4. Check your FaucetPay account\n\n"
+    "**? Cooldown:** 24 hours between claims\n"
+    "**?? Requirement:** Must be a registered FaucetPay email\n\n"
+    "**? Need help?** Contact support if you have issues."
+)
+
+STATUS_TEMPLATE = (
+    "?? **Your Status**\n\n"
+    "? **Last claim:** Success\n"
+    "?? **Email used:** {email}\n"
+    "? **Next claim in:** {hours}h {minutes}m\n\n"
+    "Please wait for the cooldown to end."
+).format
+
+READY_TEXT = (
+    "?? **Ready to Claim!**\n\n"
+    "You can claim your reward now!\n\n"
+    "Use /start to get your free USDT!"
+)
+
+NO_CLAIMS_TEXT = (
+    "?? **No Claims Yet**\n\n"
+    "You haven't made any claims yet.\n"
+    "Use /start to claim your first reward!"
+)
+
+ACCESS_DENIED = (
+    "? **Access Denied**\n\n"
+    "This command is for administrators only."
+)
+
+NO_STATS_TEXT = (
+    "?? **Bot Statistics**\n\n"
+    "No claims have been made yet.\n"
+    "Waiting for first user..."
+)
+
+CANCEL_TEXT = (
+    "? Operation cancelled.\n"
+    "Use /start to begin again."
+)
+
+# Replies that repeat across users are formatted once and reused
+@lru_cache(maxsize=256)
+def cooldown_reply(hours: int, minutes: int) -> str:
+    """Cooldown message for the given time left"""
+    return COOLDOWN_TEMPLATE(hours=hours, minutes=minutes)
+
+@lru_cache(maxsize=256)
+def failure_reply(error: str) -> str:
+    """Failed-transaction message for a FaucetPay error"""
+    return FAILURE_TEMPLATE(error=error)
 
 async def start_command(update: Update, context: CallbackContext):
     """Handle /start command"""
     user = update.effective_user
     user_id = str(user.id)
     
-    # Check if user has claimed recently (24-hour cooldown)
-    if user_id in user_claims:
-        last_claim = user_claims[user_id].get('last_claim', 0)
-        cooldown = 86400  # 24 hours in seconds
-        time_left = cooldown - (time.time() - last_claim)
+    # Check if user has claimed recently (24-hour cooldown, peek without consuming)
+    time_left = DAILY.get_retry_after(user_id)
+    
+    if time_left > 0:
+        hours, minutes = format_cooldown(time_left)
         
-        if time_left > 0:
-            hours = int(time_left // 3600)
-            minutes = int((time_left % 3600) // 60)
-            
-            await update.message.reply_text(
-                f"? **Cooldown Active**\n\n"
-                f"You have already claimed your reward.\n"
-                f"Next claim available in: **{hours}h {minutes}m**\n\n"
-                f"Please wait and try again later!"
-            )
-            return ConversationHandler.END
+        await update.message.reply_text(cooldown_reply(hours, minutes))
+        return ConversationHandler.END
     
-    welcome_message = (
-        f"?? **Congratulations, {user.first_name or 'there'}!**\n\n"
-        f"?? **You've won {DENGO} USDT!**\n\n"
-        f"To claim your reward:\n"
-        f"1?? Enter your **FaucetPay registered email**\n"
-        f"2?? We'll send {DENGO} USDT instantly\n"
-        f"3?? Check your FaucetPay balance\n\n"
-        f"?? **Please enter your FaucetPay email now:**\n"
-        f"(Example: yourname@example.com)"
-    )
+    welcome_message = WELCOME_TEMPLATE(first_name=user.first_name or 'there', dengo=DENGO)
     
     await update.message.reply_text(welcome_message, parse_mode='Markdown')
     return WAITING_FOR_EMAIL
@@ -162,32 +503,34 @@ async def handle_email(update: Update, context: CallbackContext):
     user = update.effective_user
     user_id = str(user.id)
     
+    # All local checks run before any outbound request, so rejected
+    # attempts cost no processing message and no FaucetPay call
+    
     # Validate email
     if not is_valid_email(email):
-        await update.message.reply_text(
-            "? **Invalid Email Format**\n\n"
-            "Please enter a valid email address.\n"
-            "Format: name@domain.com\n\n"
-            "Try again:"
-        )
+        await update.message.reply_text(INVALID_EMAIL_TEXT)
         return WAITING_FOR_EMAIL
     
-    # Check cooldown again (in case of multiple attempts)
-    if user_id in user_claims:
-        last_claim = user_claims[user_id].get('last_claim', 0)
-        if time.time() - last_claim < 60:  # 60 seconds minimum between attempts
-            await update.message.reply_text(
-                "? Please wait a moment before trying again."
-            )
-            return ConversationHandler.END
+    # Anti-spam check (60 seconds minimum between attempts)
+    if ANTI_SPAM.update_ratelimit(user_id) is not None:
+        await update.message.reply_text(WAIT_TEXT)
+        return ConversationHandler.END
+    
+    # Daily cooldown may have started since /start (e.g. a claim from another chat)
+    if DAILY.get_retry_after(user_id) > 0:
+        await update.message.reply_text(ALREADY_CLAIMED_TEXT)
+        return ConversationHandler.END
     
     # Show processing message
-    processing_msg = await update.message.reply_text(
-        "? **Processing your request...**\n"
-        "Please wait while we send your USDT reward."
-    )
+    processing_msg = await update.message.reply_text(PROCESSING_TEXT)
     
     try:
+        # Start the cooldown before paying out, so a slow or interrupted payout
+        # can't be claimed again; it is only lifted if FaucetPay rejects the request
+        if DAILY.update_ratelimit(user_id) is not None:
+            await processing_msg.edit_text(ALREADY_CLAIMED_TEXT)
+            return ConversationHandler.END
+        
         # Send to FaucetPay API
         payload = {
             'api_key': FAUCETPAY_API_KEY,
@@ -201,10 +544,9 @@ async def handle_email(update: Update, context: CallbackContext):
             'Accept': 'application/json'
         }
         
-        # Make API request
-        async with aiohttp.ClientSession() as session:
-            async with session.post(FAUCETPAY_API_URL, data=payload, headers=headers, timeout=10) as response:
-                result = await response.json()
+        # Make API request (reuses pooled connections)
+        async with get_http_session().post(FAUCETPAY_API_URL, data=payload, headers=headers) as response:
+            result = await response.json()
         
         logger.info(f"FaucetPay API Response: {result}")
         
@@ -228,135 +570,64 @@ async def handle_email(update: Update, context: CallbackContext):
             tx_id = result.get('payout_user_hash', 'N/A')
             short_tx = tx_id[:12] + '...' if len(tx_id) > 12 else tx_id
             
-            await processing_msg.edit_text(
-                f"? **Success! Reward Sent!**\n\n"
-                f"**Amount:** {AMOUNT} USDT\n"
-                f"**Sent to:** {email}\n"
-                f"**Transaction ID:** `{short_tx}`\n\n"
-                f"?? **Next Steps:**\n"
-                f"1. Check your FaucetPay account\n"
-                f"2. Verify the transaction\n"
-                f"3. Come back in 24 hours for more!\n\n"
-                f"? **Next claim:** 24 hours from now\n\n"
-                f"Thank you for using our bot! ??"
-            )
+            await processing_msg.edit_text(SUCCESS_TEMPLATE(amount=AMOUNT, email=email, tx=short_tx))
             
         else:
+            # FaucetPay refused the payout, so nothing was sent; let the user retry
+            DAILY.get_bucket(user_id).reset()
             error_msg = result.get('message', 'Unknown error')
-            await processing_msg.edit_text(
-                f"? **Transaction Failed**\n\n"
-                f"**Error:** {error_msg}\n\n"
-                f"**Possible reasons:**\n"
-                f" Email not registered with FaucetPay\n"
-                f" FaucetPay API limit reached\n"
-                f" Temporary service issue\n\n"
-                f"**Please try again with a valid FaucetPay email.**\n"
-                f"Use /start to retry."
-            )
+            await processing_msg.edit_text(failure_reply(str(error_msg)))
             
     except asyncio.TimeoutError:
-        await processing_msg.edit_text(
-            "? **Request Timeout**\n\n"
-            "The service is taking too long to respond.\n"
-            "Please try again in a few minutes.\n\n"
-            "Use /start to retry."
-        )
+        # The payout may still have gone through, so the cooldown stays
+        logger.warning(f"FaucetPay request timed out for user {user_id}")
+        await processing_msg.edit_text(TIMEOUT_TEXT)
     except Exception as e:
         logger.error(f"Unexpected error: {str(e)}")
-        await processing_msg.edit_text(
-            "?? **Service Temporarily Unavailable**\n\n"
-            "We're experiencing technical difficulties.\n"
-            "Please try again later.\n\n"
-            "Use /start to retry."
-        )
+        await processing_msg.edit_text(SERVICE_UNAVAILABLE_TEXT)
     
     return ConversationHandler.END
 
 async def help_command(update: Update, context: CallbackContext):
     """Handle /help command"""
-    help_text = (
-        "?? **Faucet Bot Help**\n\n"
-        "**?? What is this?**\n"
-        "Free USDT faucet bot! Get small amounts of USDT for free.\n\n"
-        "**?? Commands:**\n"
-        "/start - Claim your free USDT\n"
-        "/help - Show this help message\n"
-        "/status - Check your claim status\n"
-        "/stats - View bot statistics (admin)\n\n"
-        "**? How to claim:**\n"
-        "1. Use /start command\n"
-        "2. Enter your FaucetPay email\n"
-        "3. Receive 0.00000001 USDT instantly\n"
-        "4. Check your FaucetPay account\n\n"
-        "**? Cooldown:** 24 hours between claims\n"
-        "**?? Requirement:** Must be a registered FaucetPay email\n\n"
-        "**? Need help?** Contact support if you have issues."
-    )
-    await update.message.reply_text(help_text, parse_mode='Markdown')
+    await update.message.reply_text(HELP_TEXT, parse_mode='Markdown')
 
 async def status_command(update: Update, context: CallbackContext):
     """Handle /status command"""
     user = update.effective_user
     user_id = str(user.id)
     
-    if user_id in user_claims:
-        last_claim = user_claims[user_id].get('last_claim', 0)
-        email = user_claims[user_id].get('email', 'Unknown')
-        
-        time_since = time.time() - last_claim
-        cooldown = 86400  # 24 hours
+    time_left = DAILY.get_retry_after(user_id)
+    
+    if time_left > 0:
+        claim = user_claims.get(user_id) or {}
+        email = claim.get('email', 'Unknown')
+        hours, minutes = format_cooldown(time_left)
         
-        if time_since < cooldown:
-            time_left = cooldown - time_since
-            hours = int(time_left // 3600)
-            minutes = int((time_left % 3600) // 60)
-            
-            await update.message.reply_text(
-                f"?? **Your Status**\n\n"
-                f"? **Last claim:** Success\n"
-                f"?? **Email used:** {email}\n"
-                f"? **Next claim in:** {hours}h {minutes}m\n\n"
-                f"Please wait for the cooldown to end."
-            )
-        else:
-            await update.message.reply_text(
-                f"?? **Ready to Claim!**\n\n"
-                f"You can claim your reward now!\n\n"
-                f"Use /start to get your free USDT!"
-            )
+        await update.message.reply_text(STATUS_TEMPLATE(email=email, hours=hours, minutes=minutes))
+    elif user.id in _UNIQUE_USERS:
+        await update.message.reply_text(READY_TEXT)
     else:
-        await update.message.reply_text(
-            "?? **No Claims Yet**\n\n"
-            "You haven't made any claims yet.\n"
-            "Use /start to claim your first reward!"
-        )
+        await update.message.reply_text(NO_CLAIMS_TEXT)
 
 async def stats_command(update: Update, context: CallbackContext):
     """Handle /stats command (admin only)"""
     user = update.effective_user
     
-    # Add your Telegram user ID here for admin access
-    ADMIN_IDS = ["YOUR_TELEGRAM_USER_ID"]  # Replace with your Telegram ID
-    
-    if str(user.id) not in ADMIN_IDS:
-        await update.message.reply_text(
-            "? **Access Denied**\n\n"
-            "This command is for administrators only."
-        )
+    if user.id not in ADMIN_IDS:
+        await update.message.reply_text(ACCESS_DENIED)
         return
     
     # Get statistics
-    emails = EmailStorage.get_all_emails()
-    total_claims = len(emails)
+    total_claims = _TOTAL_CLAIMS
     
     if total_claims > 0:
-        # Count unique users
-        unique_users = len(set(e.get('user_id') for e in emails))
+        unique_users = len(_UNIQUE_USERS)
         
         # Get recent claims
-        recent_claims = emails[-5:] if len(emails) >= 5 else emails
+        recent_claims = _EMAIL_CACHE[-5:]
         recent_text = "\n".join([
-            f" {e.get('email')} ({e.get('timestamp')})"
+            f" {e.get('email')} ({format_timestamp(e.get('timestamp'))})"
             for e in recent_claims
         ])
         
@@ -369,20 +640,13 @@ async def stats_command(update: Update, context: CallbackContext):
             f"**Storage:** Emails saved: {total_claims}"
         )
     else:
-        stats_text = (
-            "?? **Bot Statistics**\n\n"
-            "No claims have been made yet.\n"
-            "Waiting for first user..."
-        )
+        stats_text = NO_STATS_TEXT
     
     await update.message.reply_text(stats_text, parse_mode='Markdown')
 
 async def cancel_command(update: Update, context: CallbackContext):
     """Cancel current operation"""
-    await update.message.reply_text(
-        "? Operation cancelled.\n"
-        "Use /start to begin again."
-    )
+    await update.message.reply_text(CANCEL_TEXT)
     return ConversationHandler.END
 
 # Create bot application
@@ -412,86 +676,150 @@ def create_application():
 # Global application instance
 bot_application = None
 
+# Persistent event loop the bot and HTTP session live on. The ASGI runtime
+# may serve each request on its own short-lived loop, so update handling is
+# handed to this one, which lasts as long as the worker process.
+BOT_LOOP: Optional[asyncio.AbstractEventLoop] = None
+
+def submit_to_bot_loop(coro) -> concurrent.futures.Future:
+    """Schedule a coroutine on the bot loop"""
+    return asyncio.run_coroutine_threadsafe(coro, BOT_LOOP)
+
+async def process_update(update: Update):
+    """Process a Telegram update with the long-lived application"""
+    # No-op once initialized; retries if initialization failed at startup
+    await bot_application.initialize()
+    await bot_application.process_update(update)
+
+async def shutdown_bot():
+    """Shut down the application and close the shared HTTP session"""
+    EmailStorage.flush()
+    await bot_application.shutdown()
+    if HTTP_SESSION is not None and not HTTP_SESSION.closed:
+        await HTTP_SESSION.close()
+
+def close_bot():
+    """Shut down the bot and stop its loop on interpreter exit"""
+    try:
+        submit_to_bot_loop(shutdown_bot()).result()
+    except Exception as e:
+        logger.error(f"Error shutting down bot: {e}")
+    BOT_LOOP.call_soon_threadsafe(BOT_LOOP.stop)
+
 def init_bot():
     """Initialize bot application"""
-    global bot_application
+    global bot_application, BOT_LOOP
+    if _EMAIL_FH is None:
+        EmailStorage.open()
+        atexit.register(EmailStorage.close)
     if bot_application is None:
         bot_application = create_application()
-        bot_application.initialize()
+    if BOT_LOOP is None:
+        BOT_LOOP = asyncio.new_event_loop()
+        threading.Thread(target=BOT_LOOP.run_forever, name='bot-loop', daemon=True).start()
+        atexit.register(close_bot)
 
 # Initialize bot
 init_bot()
 
-# Flask routes for Vercel
+# Entry fields exported by /emails, in column order
+CSV_FIELDS = ('timestamp', 'email', 'user_id', 'username', 'first_name', 'last_name')
+
+# Static body for the home page, serialized once
+_HOME_BODY = json_dumps({
+    "status": "online",
+    "service": "Telegram Faucet Bot",
+    "version": "2.0.0",
+    "description": "Free USDT faucet bot",
+    "endpoints": {
+        "GET /": "This information",
+        "POST /": "Telegram webhook endpoint",
+        "GET /health": "Health check",
+        "GET /stats": "View statistics",
+        "GET /emails": "Download emails (admin)"
+    },
+    "usage": "Add this URL as webhook in Telegram bot settings"
+})
+
+# Warm up the bot when the server sends lifespan events (process_update covers
+# it otherwise). Shutdown is left to the atexit hook: a runtime that sends
+# lifespan events per invocation must not tear down the long-lived bot loop.
+@app.before_serving
+async def startup():
+    """Initialize the bot application once per worker"""
+    try:
+        await asyncio.wrap_future(submit_to_bot_loop(bot_application.initialize()))
+    except Exception as e:
+        logger.error(f"Error initializing bot: {e}")
+
+# Quart routes for Vercel
 @app.route('/', methods=['GET'])
-def home():
+async def home():
     """Home page"""
-    return jsonify({
-        "status": "online",
-        "service": "Telegram Faucet Bot",
-        "version": "2.0.0",
-        "description": "Free USDT faucet bot",
-        "endpoints": {
-            "GET /": "This information",
-            "POST /": "Telegram webhook endpoint",
-            "GET /health": "Health check",
-            "GET /stats": "View statistics",
-            "GET /emails": "Download emails (admin)"
-        },
-        "usage": "Add this URL as webhook in Telegram bot settings"
-    })
+    return Response(_HOME_BODY, mimetype='application/json')
 
 @app.route('/health', methods=['GET'])
-def health_check():
+async def health_check():
     """Health check endpoint"""
-    return jsonify({
-        "status": "healthy",
-        "timestamp": datetime.now().isoformat(),
-        "memory_usage": len(user_claims),
-        "uptime": "running"
-    })
+    return Response(
+        f'{{"status":"healthy","timestamp":"{now_iso_cached()}",'
+        f'"memory_usage":{len(user_claims)},"uptime":"running"}}',
+        mimetype='application/json'
+    )
 
 @app.route('/stats', methods=['GET'])
-def web_stats():
+async def web_stats():
     """Web statistics endpoint"""
-    emails = EmailStorage.get_all_emails()
-    total = len(emails)
-    unique = len(set(e.get('user_id') for e in emails))
-    
-    return jsonify({
-        "total_claims": total,
-        "unique_users": unique,
-        "active_sessions": len(user_claims),
-        "last_updated": datetime.now().isoformat()
-    })
+    return Response(
+        f'{{"total_claims":{_TOTAL_CLAIMS},"unique_users":{len(_UNIQUE_USERS)},'
+        f'"active_sessions":{len(user_claims)},"last_updated":"{now_iso_cached()}"}}',
+        mimetype='application/json'
+    )
 
 @app.route('/emails', methods=['GET'])
-def download_emails():
+async def download_emails():
     """Download emails endpoint (admin)"""
     # Simple password protection
-    password = request.args.get('password')
-    if password != os.environ.get('ADMIN_PASSWORD', 'admin123'):
+    password = request.args.get('password', '')
+    expected = os.environ.get('ADMIN_PASSWORD', 'admin123')
+    if not hmac.compare_digest(password.encode(), expected.encode()):
         return jsonify({"error": "Unauthorized"}), 401
     
     emails = EmailStorage.get_all_emails()
     
-    # Create CSV format
-    csv_data = "Timestamp,Email,User ID,Username,First Name,Last Name\n"
-    for entry in emails:
-        csv_data += f"{entry.get('timestamp')},{entry.get('email')},{entry.get('user_id')},{entry.get('username')},{entry.get('first_name')},{entry.get('last_name')}\n"
+    # Stream CSV rows one at a time (csv.writer handles quoting of user-provided names)
+    def generate():
+        buf = io.StringIO()
+        writer = csv.writer(buf)
+        writer.writerow(["Timestamp", "Email", "User ID", "Username", "First Name", "Last Name"])
+        yield buf.getvalue()
+        for entry in emails:
+            buf.seek(0)
+            buf.truncate()
+            row = [entry.get(key) for key in CSV_FIELDS]
+            row[0] = format_timestamp(row[0])
+            writer.writerow(row)
+            yield buf.getvalue()
     
-    return csv_data, 200, {'Content-Type': 'text/csv', 'Content-Disposition': 'attachment; filename=emails.csv'}
+    return Response(generate(), mimetype='text/csv', headers={'Content-Disposition': 'attachment; filename=emails.csv'})
 
 @app.route('/', methods=['POST'])
 async def webhook():
     """Main webhook handler for Telegram"""
     if request.is_json:
         try:
-            update_data = request.get_json()
+            update_data = json_loads(await request.get_data())
             update = Update.de_json(update_data, bot_application.bot)
             
-            async with bot_application:
-                await bot_application.process_update(update)
+            future = submit_to_bot_loop(process_update(update))
+            try:
+                # Waited on from a worker thread: a timeout, or this request's
+                # loop closing, never cancels a handler mid-payout; it finishes
+                # on the bot loop while Telegram gets a prompt response
+                await asyncio.get_running_loop().run_in_executor(None, future.result, WEBHOOK_TIMEOUT)
+            except concurrent.futures.TimeoutError:
+                logger.warning(f"Update {update.update_id} timed out")
+                return jsonify({"status": "timeout"}), 200
             
             return jsonify({"status": "ok"})
         except Exception as e:
@@ -503,7 +831,7 @@ async def webhook():
 # Vercel serverless handler
 def handler(event, context):
     """Vercel serverless function handler"""
-    # Convert Vercel event to Flask request
+    # Convert Vercel event to Quart request
     from io import BytesIO
     import base64
     